@@ -1,5 +1,5 @@
+import itertools
 import random
-import copy
 
 
 class Minesweeper:
@@ -14,21 +14,17 @@ class Minesweeper:
         self.width = width
         self.mines = set()
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        # Initialize an empty field with no mines, one byte per cell
+        # with cell (i, j) stored at index i * width + j
+        self.board = bytearray(height * width)
 
         # Add mines randomly
         while len(self.mines) != mines:
             i = random.randrange(height)
             j = random.randrange(width)
-            if not self.board[i][j]:
+            if not self.board[i * width + j]:
                 self.mines.add((i, j))
-                self.board[i][j] = True
+                self.board[i * width + j] = 1
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -41,7 +37,7 @@ class Minesweeper:
         for i in range(self.height):
             print("--" * self.width + "-")
             for j in range(self.width):
-                if self.board[i][j]:
+                if self.board[i * self.width + j]:
                     print("|X", end="")
                 else:
                     print("| ", end="")
@@ -50,7 +46,7 @@ class Minesweeper:
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i * self.width + j])
 
     def nearby_mines(self, cell):
         """
@@ -59,23 +55,19 @@ class Minesweeper:
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
+        i, j = cell
 
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+        # Sum up the 3x3 block around the cell clipped to the board,
+        # each row of the block is a contiguous slice of the board
+        start = max(0, j - 1)
+        stop = min(self.width, j + 2)
+        count = 0
+        for row in range(max(0, i - 1), min(self.height, i + 2)):
+            offset = row * self.width
+            count += sum(self.board[offset + start:offset + stop])
 
-        return count
+        # Ignore the cell itself
+        return count - self.board[i * self.width + j]
 
     def won(self):
         """
@@ -91,6 +83,8 @@ class Sentence:
     and a count of the number of those cells which are mines.
     """
 
+    __slots__ = ("cells", "count")
+
     def __init__(self, cells, count):
         self.cells = set(cells)
         self.count = count
@@ -98,6 +92,9 @@ class Sentence:
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        return hash((frozenset(self.cells), self.count))
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -105,15 +102,17 @@ class Sentence:
         """
         Returns the set of all cells in self.cells known to be mines.
         """
-        if self.count == len(self.cells):
-            return (cell for cell in self.cells)
+        if self.cells and self.count == len(self.cells):
+            return frozenset(self.cells)
+        return frozenset()
 
     def known_safes(self):
         """
         Returns the set of all cells in self.cells known to be safe.
         """
-        if self.count == 0:
-            return (cell for cell in self.cells)
+        if self.cells and self.count == 0:
+            return frozenset(self.cells)
+        return frozenset()
 
     def mark_mine(self, cell):
         """
@@ -129,7 +128,7 @@ class Sentence:
         Updates internal knowledge representation given the fact that
         a cell is known to be safe.
         """
-        if cell in self.cells and self.count > 0:
+        if cell in self.cells:
             self.cells.remove(cell)
 
 
@@ -154,31 +153,28 @@ class MinesweeperAI:
         # List of sentences about the game known to be true
         self.knowledge = []
 
-    def _get_all_cells(self):
-        """
-        Returns a set of all cells on the board
-        """
-        all_cells = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                all_cells.add((i, j))
-        return all_cells
+        # All cells on the board
+        self._all_cells = frozenset(
+            (i, j) for i in range(height) for j in range(width)
+        )
+
+        # Surrounding cells only depend on the board size, so compute them once
+        self._neighbors = {
+            (i, j): frozenset(
+                (ii, jj)
+                for ii in range(max(0, i - 1), min(height, i + 2))
+                for jj in range(max(0, j - 1), min(width, j + 2))
+                if (ii, jj) != (i, j)
+            )
+            for i in range(height)
+            for j in range(width)
+        }
 
     def _get_surrounding_cells(self, cell):
         """
         Returns a set of all surrounding cells of a cell
         """
-        # find correct limits for cells
-        border_height_max = min(self.height, cell[0] + 1)
-        border_height_min = max(0, cell[0] - 1)
-        border_width_max = min(self.width, cell[1] + 1)
-        border_width_min = max(0, cell[1] - 1)
-        surr_cells = set()
-        for i in range(border_height_min, border_height_max + 1):
-            for j in range(border_width_min, border_width_max + 1):
-                if (i, j) != cell:
-                    surr_cells.add((i, j))
-        return surr_cells
+        return self._neighbors[cell]
 
     def mark_mine(self, cell):
         """
@@ -188,6 +184,7 @@ class MinesweeperAI:
         self.mines.add(cell)
         for sentence in self.knowledge:
             sentence.mark_mine(cell)
+        self._clean_knowledge()
 
     def mark_safe(self, cell):
         """
@@ -197,6 +194,7 @@ class MinesweeperAI:
         self.safes.add(cell)
         for sentence in self.knowledge:
             sentence.mark_safe(cell)
+        self._clean_knowledge()
 
     def add_knowledge(self, cell, count):
         """
@@ -216,56 +214,89 @@ class MinesweeperAI:
         self.moves_made.add(cell)
         self.safes.add(cell)
         surr_cells = self._get_surrounding_cells(cell)
-        new_sentence = Sentence(surr_cells, count)
 
-        # add the new sentence to knowledge base
-        self.knowledge.append(new_sentence)
-        # mark safes if there are any
+        # all surrounding cells are safe, no sentence needed
         if count == 0:
-            for surr_cell in surr_cells:
-                new_sentence.mark_safe(surr_cell)
-                self.safes.add(surr_cell)
-                if surr_cell in self.mines:
-                    self.mines.remove(surr_cell)
-
-        # mark mines if there are any
-        if count == len(surr_cells):
-            for surr_cell in surr_cells:
-                new_sentence.mark_mine(surr_cell)
-                self.mines.add(surr_cell)
-
-        # compare information with other sentences
+            self.safes |= surr_cells
+        # all surrounding cells are mines, no sentence needed
+        elif count == len(surr_cells):
+            self.mines |= surr_cells
+        # add the new sentence to knowledge base
+        else:
+            self.knowledge.append(Sentence(surr_cells, count))
+
+        # compare information with other sentences until nothing new is found
+        while True:
+            known = len(self.mines) + len(self.safes)
+            for sentence in self.knowledge:
+                self._update_sentence(sentence)
+                self.mines |= sentence.known_mines()
+                self.safes |= sentence.known_safes()
+
+            # drop known cells so subsets show up between sentences
+            for sentence in self.knowledge:
+                for cell in sentence.cells & self.mines:
+                    sentence.mark_mine(cell)
+                for cell in sentence.cells & self.safes:
+                    sentence.mark_safe(cell)
+            self._clean_knowledge()
+
+            new_sentences = self._infer_sentences()
+            self.knowledge.extend(new_sentences)
+
+            if not new_sentences and known == len(self.mines) + len(self.safes):
+                break
+
+    def _clean_knowledge(self):
+        """
+        Removes sentences without cells, which don't tell us anything,
+        and duplicate sentences from the knowledge base.
+        """
+        seen = set()
+        knowledge = []
         for sentence in self.knowledge:
-            self._update_sentence(sentence)
+            if sentence.cells and sentence not in seen:
+                seen.add(sentence)
+                knowledge.append(sentence)
+        self.knowledge = knowledge
+
+    def _infer_sentences(self):
+        """
+        Returns new sentences inferred from pairs of sentences in the
+        knowledge base: if {A} = n and {B} = m with A a subset of B,
+        then {B - A} = m - n.
+        """
+        known = set(self.knowledge)
+        new_sentences = []
+        for s1, s2 in itertools.combinations(self.knowledge, 2):
+            if s1.cells < s2.cells:
+                subset, superset = s1, s2
+            elif s2.cells < s1.cells:
+                subset, superset = s2, s1
+            else:
+                continue
+            derived = Sentence(superset.cells - subset.cells, superset.count - subset.count)
+            if derived not in known:
+                known.add(derived)
+                new_sentences.append(derived)
+        return new_sentences
 
     def _update_sentence(self, sentence):
         """
         Updates a given sentence with the knowledge about mines and safes.
         """
-        # work with a copy to keep the original sentence
-        deepcopy_sentence = copy.deepcopy(sentence)
-        if deepcopy_sentence.count > 0 and len(sentence.cells) > 0:
-
-            # get rid of safes to identify mines
-            for safe in self.safes:
-                deepcopy_sentence.cells.remove(safe) if safe in deepcopy_sentence.cells else None
-                if len(deepcopy_sentence.cells) == deepcopy_sentence.count and len(deepcopy_sentence.cells) > 0:
-                    temp_set = set() # store mines temporarily in order to avoid KEYERROR
-                    for cell in deepcopy_sentence.cells:
-                        self.mines.add(cell)
-                        temp_set.add(cell)
-                    for cell in temp_set:
-                        deepcopy_sentence.cells.remove(cell)
-                        deepcopy_sentence.count -= 1
-
-            # get rid of mines to find safes
-            for mine in self.mines:
-                if mine in deepcopy_sentence.cells:
-                    deepcopy_sentence.cells.remove(mine)
-                    deepcopy_sentence.count -= 1
-                    if deepcopy_sentence.count == 0 and len(deepcopy_sentence.cells) > 0:
-                        for cell in deepcopy_sentence.cells:
-                            self.safes.add(cell)
+        # get rid of safes and known mines, each mine lowers the count
+        cells = sentence.cells - self.safes
+        mines = cells & self.mines
+        cells -= mines
+        count = sentence.count - len(mines)
+
+        # all remaining cells are mines
+        if cells and count == len(cells):
+            self.mines |= cells
+        # all remaining cells are safe
+        elif cells and count == 0:
+            self.safes |= cells
 
     def make_safe_move(self):
         """
@@ -276,15 +307,11 @@ class MinesweeperAI:
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        cells = self._get_all_cells()
-        save_moves = []
-        for cell in cells:
-            if cell not in self.moves_made and cell in self.safes:
-                save_moves.append(cell)
-        if len(save_moves) == 0:
+        safe_moves = self.safes - self.moves_made
+        if len(safe_moves) == 0:
             return None
         else:
-            return random.choice(save_moves)
+            return random.choice(tuple(safe_moves))
 
     def make_random_move(self):
         """
@@ -293,14 +320,8 @@ class MinesweeperAI:
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        if self.make_safe_move() == None:
-            # get all moves
-            cells = self._get_all_cells()
-            potential_moves = []
-            for cell in cells:
-                if cell not in self.moves_made and cell not in self.mines:
-                    potential_moves.append(cell)
-            if len(potential_moves) == 0:
-                return None
-            else:
-                return random.choice(potential_moves)
+        potential_moves = self._all_cells - self.moves_made - self.mines
+        if len(potential_moves) == 0:
+            return None
+        else:
+            return random.choice(tuple(potential_moves))
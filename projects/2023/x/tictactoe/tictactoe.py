@@ -3,12 +3,49 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+from functools import lru_cache
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# every line of three squares on the board, square (i, j) is bit 3 * i + j
+WIN_MASKS = (0b111000000, 0b000111000, 0b000000111,
+             0b100100100, 0b010010010, 0b001001001,
+             0b100010001, 0b001010100)
+
+# squares ordered center, corners, edges to find forced wins early
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# on an empty board all corners and all edges are symmetric
+OPENING_MOVES = (4, 0, 1)
+
+
+def _build_winner_table():
+    """
+    Returns the outcome of every board, indexed by (x_mask << 9) | o_mask:
+    0 if the game is not over, 1 if X won, 2 if O won and 3 for a tie.
+    """
+    table = bytearray(1 << 18)
+    for x_mask in range(1 << 9):
+        # walk all subsets of the squares not taken by X
+        free = ~x_mask & 0x1FF
+        o_mask = free
+        while True:
+            if any(x_mask & mask == mask for mask in WIN_MASKS):
+                table[(x_mask << 9) | o_mask] = 1
+            elif any(o_mask & mask == mask for mask in WIN_MASKS):
+                table[(x_mask << 9) | o_mask] = 2
+            elif x_mask | o_mask == 0x1FF:
+                table[(x_mask << 9) | o_mask] = 3
+            if o_mask == 0:
+                break
+            o_mask = (o_mask - 1) & free
+    return table
+
+
+WINNER = _build_winner_table()
+
 
 def initial_state():
     """
@@ -19,25 +56,44 @@ def initial_state():
             [EMPTY, EMPTY, EMPTY]]
 
 
+def _to_masks(board):
+    """
+    Converts a board into a tuple of bitboards (x_mask, o_mask).
+    """
+    x_mask = 0
+    o_mask = 0
+    for i, row in enumerate(board):
+        for j, field in enumerate(row):
+            if field == X:
+                x_mask |= 1 << (3 * i + j)
+            elif field == O:
+                o_mask |= 1 << (3 * i + j)
+    return x_mask, o_mask
+
+
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    list_board = [field for row in board for field in row]
-    return X if list_board.count(EMPTY) % 2 != 0 else O
+    return _player(*_to_masks(board))
+
+
+def _player(x_mask, o_mask):
+    # X moves whenever an even number of squares is taken
+    return X if (x_mask | o_mask).bit_count() % 2 == 0 else O
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    actions = set()
-    for row in enumerate(board):
-        if EMPTY in row[1]:  # if there are no EMPTY values left we can skip
-            for field in enumerate(row[1]):
-                if field[1] == EMPTY:
-                    actions.add((row[0], field[0]))
-    return actions
+    return {divmod(square, 3) for square in _actions(*_to_masks(board))}
+
+
+def _actions(x_mask, o_mask):
+    # squares that are not taken by either player
+    taken = x_mask | o_mask
+    return [square for square in MOVE_ORDER if not (taken >> square) & 1]
 
 
 def result(board, action):
@@ -46,62 +102,60 @@ def result(board, action):
     """
     # get current player
     current_player = player(board)
-    deepcopy_board = copy.deepcopy(board)
+    # copying the rows is enough, the fields themselves are immutable
+    new_board = [row[:] for row in board]
     # change the field that is being played
     row = action[0]
     col = action[1]
-    if deepcopy_board[row][col] == EMPTY:
-        deepcopy_board[row][col] = current_player
-        return deepcopy_board
+    if new_board[row][col] == EMPTY:
+        new_board[row][col] = current_player
+        return new_board
     else:
         raise Exception("Invalid move")
 
 
+def _result(x_mask, o_mask, square):
+    bit = 1 << square
+    if _player(x_mask, o_mask) == X:
+        return x_mask | bit, o_mask
+    return x_mask, o_mask | bit
+
+
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    # check rows for winner
-    for row in board:
-        if len(set(row)) == 1 and EMPTY not in row:
-            return X if X in row else O
-    # check columns
-    for n in range(0,3):
-        col = [row[n] for row in board]
-        if len(set(col)) == 1  and EMPTY not in col:
-            return X if X in col else O
-    # check first diagonal for winner
-    d1 = [board[el][el] for el in range(0,3)]
-    if len(set(d1)) == 1 and EMPTY not in d1:
-        return X if X in d1 else O
-    # check second diagonal for winner
-    board = list(reversed(board))
-    d2 = [board[el][el] for el in range(0,3)]
-    if len(set(d2)) == 1 and EMPTY not in d2:
-        return X if X in d2 else O
+    return _winner(*_to_masks(board))
+
+
+def _winner(x_mask, o_mask):
+    return (None, X, O, None)[WINNER[(x_mask << 9) | o_mask]]
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board):
-        return True
-    else:
-        board = [field for row in board for field in row]
-        if EMPTY in board:
-            return False
-        else:
-            return True
+    return _terminal(*_to_masks(board))
+
+
+def _terminal(x_mask, o_mask):
+    # game is over if someone won or all squares are taken
+    return WINNER[(x_mask << 9) | o_mask] != 0
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
+    return _utility(*_to_masks(board))
+
+
+def _utility(x_mask, o_mask):
+    game_winner = _winner(x_mask, o_mask)
+    if game_winner == X:
         return 1
-    elif winner(board) == O:
+    elif game_winner == O:
         return -1
     else:
         return 0
@@ -111,40 +165,67 @@ def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    if terminal(board):
+    x_mask, o_mask = _to_masks(board)
+    if _terminal(x_mask, o_mask):
         return None
     else:
-        current_player = player(board)
+        squares = _actions(x_mask, o_mask)
+        # only search one corner and one edge for the first move
+        if not x_mask | o_mask:
+            squares = OPENING_MOVES
+        current_player = _player(x_mask, o_mask)
         if current_player == X:
             v = -math.inf
-            for action in actions(board):
-                best_v = min_value(result(board,action))
+            for square in squares:
+                best_v = _solve(*_result(x_mask, o_mask, square))
                 if best_v > v:
                     v = best_v
-                    optimal_action = action
+                    optimal_action = divmod(square, 3)
+                    # X can't do better than winning
+                    if v == 1:
+                        break
         else:
             v = math.inf
-            for action in actions(board):
-                best_v = max_value(result(board,action))
+            for square in squares:
+                best_v = _solve(*_result(x_mask, o_mask, square))
                 if best_v < v:
                     v = best_v
-                    optimal_action = action
+                    optimal_action = divmod(square, 3)
+                    # O can't do better than winning
+                    if v == -1:
+                        break
         return optimal_action
 
 
-def max_value(board):
-    if terminal(board):
-        return utility(board)
+@lru_cache(maxsize=None)
+def _solve(x_mask, o_mask):
+    """
+    Returns the exact minimax value of a state.
+    """
+    if _player(x_mask, o_mask) == X:
+        return max_value(x_mask, o_mask)
+    return min_value(x_mask, o_mask)
+
+
+def max_value(x_mask, o_mask):
+    if _terminal(x_mask, o_mask):
+        return _utility(x_mask, o_mask)
     v = -math.inf
-    for action in actions(board):
-        v = max(v, min_value(result(board, action)))
+    for square in _actions(x_mask, o_mask):
+        v = max(v, _solve(*_result(x_mask, o_mask, square)))
+        # X can't do better than winning, the value is still exact
+        if v == 1:
+            break
     return v
 
 
-def min_value(board):
-    if terminal(board):
-        return utility(board)
+def min_value(x_mask, o_mask):
+    if _terminal(x_mask, o_mask):
+        return _utility(x_mask, o_mask)
     v = math.inf
-    for action in actions(board):
-        v = min(v, max_value(result(board, action)))
-    return v
\ No newline at end of file
+    for square in _actions(x_mask, o_mask):
+        v = min(v, _solve(*_result(x_mask, o_mask, square)))
+        # O can't do better than winning, the value is still exact
+        if v == -1:
+            break
+    return v
@@ -1,5 +1,4 @@
 import cv2
-import numpy as np
 import os
 import sys
 import tensorflow as tf
@@ -7,6 +6,7 @@ import tensorflow as tf
 from sklearn.model_selection import train_test_split
 
 EPOCHS = 10
+BATCH_SIZE = 128
 IMG_WIDTH = 30
 IMG_HEIGHT = 30
 NUM_CATEGORIES = 43
@@ -19,22 +19,17 @@ def main():
     if len(sys.argv) not in [2, 3]:
         sys.exit("Usage: python traffic.py data_directory [model.h5]")
 
-    # Get image arrays and labels for all image files
-    images, labels = load_data(sys.argv[1])
-    # Split data into training and testing sets
-    labels = tf.keras.utils.to_categorical(labels)
-    x_train, x_test, y_train, y_test = train_test_split(
-        np.array(images), np.array(labels), test_size=TEST_SIZE
-    )
+    # Get training and testing datasets for all image files
+    train_ds, test_ds = load_data(sys.argv[1])
 
     # Get a compiled neural network
     model = get_model()
 
     # Fit model on training data
-    model.fit(x_train, y_train, epochs=EPOCHS)
+    model.fit(train_ds, epochs=EPOCHS)
 
     # Evaluate neural network performance
-    model.evaluate(x_test,  y_test, verbose=2)
+    model.evaluate(test_ds, verbose=2)
 
     # Save model to file
     if len(sys.argv) == 3:
@@ -51,27 +46,64 @@ def load_data(data_dir):
     0 through NUM_CATEGORIES - 1. Inside each category directory will be some
     number of image files.
 
-    Return tuple `(images, labels)`. `images` should be a list of all
-    of the images in the data directory, where each image is formatted as a
-    numpy ndarray with dimensions IMG_WIDTH x IMG_HEIGHT x 3. `labels` should
-    be a list of integer labels, representing the categories for each of the
-    corresponding `images`.
+    Return tuple `(train_ds, test_ds)` of `tf.data.Dataset`s, split by
+    TEST_SIZE. Each dataset yields batches of `(images, labels)`, where each
+    image has dimensions IMG_WIDTH x IMG_HEIGHT x 3 and each label is the
+    one-hot encoded category of the corresponding image.
     """
-    images = []
+    # collect all image files, they are only read while training
+    paths = []
     labels = []
     for subdir, dirs, files in os.walk(data_dir):
             for file in files:
                 file = os.path.join(subdir, file)
                 if file.endswith(".ppm"):
-                    # read image to numpy.ndarray
-                    image = cv2.imread(file)
-                    # convert to RGB
-                    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                    # resize image
-                    image = cv2.resize(image, (IMG_WIDTH, IMG_HEIGHT))   
-                    images.append(image)
-                    labels.append(subdir.split(os.path.sep)[-1])
-    return images, labels
+                    paths.append(file)
+                    labels.append(int(subdir.split(os.path.sep)[-1]))
+
+    # Split data into training and testing sets
+    x_train, x_test, y_train, y_test = train_test_split(
+        paths, labels, test_size=TEST_SIZE
+    )
+    return (
+        make_dataset(x_train, y_train, shuffle=True),
+        make_dataset(x_test, y_test)
+    )
+
+
+def make_dataset(paths, labels, shuffle=False):
+    """
+    Returns a `tf.data.Dataset` of batched `(image, label)` pairs for the
+    image files in `paths` and their integer `labels`, reshuffled every
+    epoch if `shuffle` is set.
+    """
+    def load(path, label):
+        # tf.io can't decode ppm files, so read them with cv2
+        image = tf.numpy_function(read_image, [path], tf.uint8)
+        image.set_shape((IMG_HEIGHT, IMG_WIDTH, 3))
+        return image, tf.one_hot(label, NUM_CATEGORIES)
+
+    dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+    dataset = dataset.map(load, num_parallel_calls=tf.data.AUTOTUNE)
+    # decode every image only once
+    dataset = dataset.cache()
+    if shuffle:
+        dataset = dataset.shuffle(len(paths))
+    # overlap loading with training
+    return dataset.batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+
+
+def read_image(path):
+    """
+    Returns the image file at `path` as a numpy ndarray with dimensions
+    IMG_WIDTH x IMG_HEIGHT x 3.
+    """
+    # read image to numpy.ndarray
+    image = cv2.imread(path.decode())
+    # resize image first, so fewer pixels need to be converted
+    image = cv2.resize(image, (IMG_WIDTH, IMG_HEIGHT))
+    # convert to RGB
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
 
 def get_model():
@@ -80,15 +112,22 @@ def get_model():
     `input_shape` of the first layer is `(IMG_WIDTH, IMG_HEIGHT, 3)`.
     The output layer should have `NUM_CATEGORIES` units, one for each category.
     """
+    # compute in float16 on GPUs, keeping the variables in float32
+    if tf.config.list_physical_devices("GPU"):
+        tf.keras.mixed_precision.set_global_policy("mixed_float16")
+
     model = tf.keras.Sequential([
         # start with convolution layer
         tf.keras.layers.Conv2D(
             32, # number of filters
             (3,3), # gridsize to be processed
-            activation="sigmoid", # activation function
+            activation="relu", # activation function
             input_shape=(30,30,3) # size of the input
         ),
 
+        # normalize the activations to converge in fewer epochs
+        tf.keras.layers.BatchNormalization(),
+
         # max pooling layer
         tf.keras.layers.MaxPooling2D(
             pool_size=(2,2) # gridsize to be pooled
@@ -100,7 +139,7 @@ def get_model():
         # add hidden layers
         tf.keras.layers.Dense(
             256, # number of nodes
-            activation="sigmoid"
+            activation="relu"
         ),
 
         # add a dropout to avoid overfitting
@@ -111,7 +150,8 @@ def get_model():
         # final output layer
         tf.keras.layers.Dense(
             43, # number of possible categories (3 for test)
-            activation="softmax"
+            activation="softmax",
+            dtype="float32" # keep the softmax numerically stable
         )
 
     ]